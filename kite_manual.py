@@ -1,13 +1,15 @@
 import os
+import logging
 import time
 import sqlite3
+import queue
 import threading
 import signal
 import sys
-from datetime import datetime, time as dtime
-from collections import deque, defaultdict
+from datetime import datetime, time as dtime, timedelta, timezone
 
-import pytz
+import numpy as np
+from numba import njit
 import my_helpers as my
 from kiteconnect import KiteConnect, KiteTicker
 
@@ -21,7 +23,7 @@ MAX_RUNTIME = 5.5 * 60 * 60   # backup safety (seconds)
 ROLLING_WINDOW = 10
 SAVE_INTERVAL = 10           # seconds
 
-IST = pytz.timezone("Asia/Kolkata")
+IST = timezone(timedelta(hours=5, minutes=30))   # fixed offset, no DST
 START_TIME = time.time()
 
 MARKET_START = dtime(9, 15)
@@ -43,27 +45,175 @@ print(f"✅ Tokens loaded: {len(TOKENS)}")
 TODAY = datetime.now(IST).strftime("%Y-%m-%d")
 DB_FILE = f"kite_{TODAY}.db"
 
+def connect_db():
+    # isolation_level=None: no implicit BEGINs, load_raw_log manages its
+    # own transaction
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False, isolation_level=None)
+    # page_size only takes effect on a fresh file, before WAL and any table
+    conn.execute("PRAGMA page_size=8192")
+    # WAL + synchronous=NORMAL → one WAL append per commit instead of
+    # rollback-journal fsyncs; readers don't block the writer
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    # 128 MB page cache + 256 MB mmap keep the hot B-tree pages resident
+    conn.execute("PRAGMA cache_size=-131072")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+# one connection for the whole session, closed in graceful_shutdown
+CONN = connect_db()
+
+def create_tables():
+    # a single row-store table for every symbol: the end-of-day load
+    # appends to one B-tree instead of one table per instrument
+    CONN.execute('''
+        CREATE TABLE IF NOT EXISTS ticks (
+            symbol TEXT,
+            timestamp TEXT,
+            ltp REAL,
+            volume INTEGER,
+            avg_buy_qty REAL,
+            avg_sell_qty REAL
+        )
+    ''')
+
+def create_indexes():
+    # built once the day's rows are in (graceful_shutdown), so intraday
+    # INSERTs don't pay for index maintenance
+    CONN.execute(
+        "CREATE INDEX IF NOT EXISTS ix_ticks_symbol_ts ON ticks (symbol, timestamp)"
+    )
+
+create_tables()
+
+INSERT_SQL = "INSERT INTO ticks VALUES (?, ?, ?, ?, ?, ?)"
+
+# ================= RAW TICK LOG =================
+# intraday saves append fixed-size binary records to a per-day file;
+# graceful_shutdown bulk-loads it into ticks in one transaction. A file
+# left behind by an earlier run today is appended to and loaded with it.
+LOG_FILE = f"kite_{TODAY}.bin"
+RECORD = np.dtype([
+    ("ts", "<i8"),              # epoch seconds of the save
+    ("token", "<i8"),
+    ("ltp", "<f8"),
+    ("volume", "<i8"),
+    ("avg_buy_qty", "<f8"),
+    ("avg_sell_qty", "<f8"),
+])
+LOAD_SLICE = 100_000     # records per executemany in load_raw_log
+
+def open_raw_log():
+    # unbuffered: each save is a single write() and nothing sits in a buffer
+    f = open(LOG_FILE, "ab", buffering=0)
+    # a run that died mid-write left a partial record at the end; cut it off
+    # so this run's appends stay aligned to RECORD
+    size = f.seek(0, os.SEEK_END)
+    f.truncate(size - size % RECORD.itemsize)
+    return f
+
+raw_log = open_raw_log()
+
+def load_raw_log():
+    raw_log.close()
+    n = os.path.getsize(LOG_FILE) // RECORD.itemsize
+    if n:
+        rec = np.memmap(LOG_FILE, dtype=RECORD, mode="r", shape=(n,))
+        stamps = {}
+
+        # one-shot load: durability of this single commit isn't worth fsyncs
+        CONN.execute("PRAGMA synchronous=OFF")
+        try:
+            CONN.execute("BEGIN IMMEDIATE")
+            try:
+                # a slice at a time, so only LOAD_SLICE records are ever
+                # Python objects at once
+                for start in range(0, n, LOAD_SLICE):
+                    part = rec[start:start + LOAD_SLICE]
+                    ts = part["ts"].tolist()
+                    for t in set(ts).difference(stamps):
+                        stamps[t] = datetime.fromtimestamp(t, IST).strftime("%Y-%m-%d %H:%M:%S")
+                    CONN.executemany(INSERT_SQL, zip(
+                        [token_to_symbol.get(t, str(t)) for t in part["token"].tolist()],
+                        [stamps[t] for t in ts],
+                        part["ltp"].tolist(), part["volume"].tolist(),
+                        part["avg_buy_qty"].tolist(), part["avg_sell_qty"].tolist()
+                    ))
+            except Exception:
+                CONN.rollback()
+                raise
+            CONN.execute("COMMIT")
+        finally:
+            CONN.execute("PRAGMA synchronous=NORMAL")
+        del rec, part
+
+    os.remove(LOG_FILE)
+
 # ================= IN-MEMORY STORE =================
-tick_store = defaultdict(lambda: {
-    "ltp": None,
-    "volume": None,
-    "buy_qty": deque(maxlen=ROLLING_WINDOW),
-    "sell_qty": deque(maxlen=ROLLING_WINDOW),
-})
-
-lock = threading.Lock()
+# struct-of-arrays: slot i of every array belongs to TOKENS[i]
+N_TOKENS = len(TOKENS)
+TOKEN_IDX = {token: i for i, token in enumerate(TOKENS)}
+TOKEN_ARR = np.array(TOKENS, dtype=np.int64)
+
+tick_ltp = np.full(N_TOKENS, np.nan)            # NaN until the first tick
+tick_volume = np.zeros(N_TOKENS, dtype=np.int64)
+
+# rolling buy/sell quantity windows as ring buffers with running sums;
+# both are appended on every tick so they share head and count
+buy_win = np.zeros((N_TOKENS, ROLLING_WINDOW), dtype=np.int64)
+sell_win = np.zeros((N_TOKENS, ROLLING_WINDOW), dtype=np.int64)
+buy_sum = np.zeros(N_TOKENS, dtype=np.int64)
+sell_sum = np.zeros(N_TOKENS, dtype=np.int64)
+win_head = np.zeros(N_TOKENS, dtype=np.int16)
+win_cnt = np.zeros(N_TOKENS, dtype=np.int16)
+
+@njit(cache=True, nogil=True)
+def ingest(idx, last_price, volume, buy, sell,
+           tick_ltp, tick_volume, buy_win, sell_win, buy_sum, sell_sum,
+           win_head, win_cnt, window):
+    # one call per tick message. Each window update is O(1): overwrite the
+    # oldest slot and adjust the running sums by the difference (the
+    # zero-initialised buffer makes the warm-up case work too)
+    for k in range(idx.shape[0]):
+        i = idx[k]
+        tick_ltp[i] = last_price[k]
+        tick_volume[i] = volume[k]
+        h = win_head[i]
+        buy_sum[i] += buy[k] - buy_win[i, h]
+        sell_sum[i] += sell[k] - sell_win[i, h]
+        buy_win[i, h] = buy[k]
+        sell_win[i, h] = sell[k]
+        win_head[i] = (h + 1) % window
+        win_cnt[i] = min(win_cnt[i] + 1, window)
+
+# compile now rather than on the first tick message
+_empty_i, _empty_f = np.empty(0, dtype=np.int64), np.empty(0)
+ingest(_empty_i, _empty_f, _empty_i, _empty_i, _empty_i,
+       tick_ltp, tick_volume, buy_win, sell_win, buy_sum, sell_sum,
+       win_head, win_cnt, ROLLING_WINDOW)
+
+# on_ticks only enqueues raw messages; the consumer thread is the single
+# writer of the store above (and of the raw log), so no locks are needed
+raw_q = queue.SimpleQueue()
+
 last_save_time = time.time()
 shutdown_event = threading.Event()
 kws = None
+consumer = None
+log = logging.getLogger(__name__)
 
 # ================= MARKET TIME CHECK =================
+# today's window as epoch seconds, so the per-second checks are float compares
+_today = datetime.now(IST).date()
+MARKET_OPEN_EPOCH = datetime.combine(_today, MARKET_START, tzinfo=IST).timestamp()
+MARKET_CLOSE_EPOCH = datetime.combine(_today, MARKET_END, tzinfo=IST).timestamp()
+
 def is_market_open():
-    now = datetime.now(IST).time()
-    return MARKET_START <= now < MARKET_END
+    return MARKET_OPEN_EPOCH <= time.time() < MARKET_CLOSE_EPOCH
 
 def is_market_closed():
-    now = datetime.now(IST).time()
-    return now >= MARKET_END
+    return time.time() >= MARKET_CLOSE_EPOCH
 
 # ================= DATABASE SAVE =================
 def save_to_db_batch(force=False):
@@ -79,66 +229,127 @@ def save_to_db_batch(force=False):
 
     last_save_time = now
 
-    with lock:
-        if not tick_store:
+    # only runs on the consumer thread (or after it has stopped), so the
+    # store can be read without locking
+    idx = np.flatnonzero(~np.isnan(tick_ltp))
+    snap_ltp = tick_ltp[idx]
+    snap_volume = tick_volume[idx]
+    snap_buy = buy_sum[idx]
+    snap_sell = sell_sum[idx]
+    snap_cnt = win_cnt[idx]
+
+    if not len(idx):
+        return
+
+    # averages for every symbol at once
+    cnt = np.maximum(snap_cnt, 1)
+    avg_buy = np.round(snap_buy / cnt, 2)
+    avg_sell = np.round(snap_sell / cnt, 2)
+
+    rec = np.empty(len(idx), dtype=RECORD)
+    rec["ts"] = int(now)
+    rec["token"] = TOKEN_ARR[idx]
+    rec["ltp"] = snap_ltp
+    rec["volume"] = snap_volume
+    rec["avg_buy_qty"] = avg_buy
+    rec["avg_sell_qty"] = avg_sell
+    raw_log.write(rec.tobytes())
+
+    # debug-level (off unless logging is configured): no stdout write per save
+    log.debug("💾 Ticks spooled @ %d (%d symbols)", int(now), len(idx))
+
+# ================= TICK CONSUMER =================
+def process_ticks(ticks):
+    idx, ltps, vols, buys, sells = [], [], [], [], []
+    for t in ticks:
+        token = t["instrument_token"]
+        i = TOKEN_IDX.get(token)
+        if i is None:
+            # not one of ours; the store is preallocated for TOKENS only
+            continue
+        idx.append(i)
+        ltps.append(t.get("last_price", 0.0))
+        vols.append(t.get("volume_traded", 0))
+        buys.append(t.get("total_buy_quantity", 0))
+        sells.append(t.get("total_sell_quantity", 0))
+
+    if not idx:
+        return
+
+    idx = np.array(idx, dtype=np.int64)
+    ltps = np.array(ltps, dtype=np.float64)
+    vols = np.array(vols, dtype=np.int64)
+    buys = np.array(buys, dtype=np.int64)
+    sells = np.array(sells, dtype=np.int64)
+
+    ingest(idx, ltps, vols, buys, sells,
+           tick_ltp, tick_volume, buy_win, sell_win, buy_sum, sell_sum,
+           win_head, win_cnt, ROLLING_WINDOW)
+
+def drain_queue():
+    while True:
+        try:
+            ticks = raw_q.get_nowait()
+        except queue.Empty:
             return
+        if ticks is not None:
+            process_ticks(ticks)
 
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-
-        for token, data in tick_store.items():
-            if data["ltp"] is None:
-                continue
-
-            avg_buy = (
-                round(sum(data["buy_qty"]) / len(data["buy_qty"]), 2)
-                if data["buy_qty"] else 0
-            )
-            avg_sell = (
-                round(sum(data["sell_qty"]) / len(data["sell_qty"]), 2)
-                if data["sell_qty"] else 0
-            )
-
-            table_name = token_to_symbol.get(token, str(token))
-            ts = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
-
-            c.execute(f'''
-                CREATE TABLE IF NOT EXISTS "{table_name}" (
-                    timestamp TEXT,
-                    ltp REAL,
-                    volume INTEGER,
-                    avg_buy_qty REAL,
-                    avg_sell_qty REAL
-                )
-            ''')
-
-            c.execute(
-                f'INSERT INTO "{table_name}" VALUES (?, ?, ?, ?, ?)',
-                (ts, data["ltp"], data["volume"], avg_buy, avg_sell)
-            )
-
-        conn.commit()
-        conn.close()
-
-        print(f"💾 DB saved @ {datetime.now(IST).strftime('%H:%M:%S')}")
+def seconds_to_next_save():
+    # how long the consumer may block when no ticks arrive; None (block until
+    # a message or the shutdown sentinel) once the market window is over
+    now = time.time()
+    if now >= MARKET_CLOSE_EPOCH:
+        return None
+    return max(0.0, max(MARKET_OPEN_EPOCH, last_save_time + SAVE_INTERVAL) - now)
+
+def consume():
+    while True:
+        try:
+            ticks = raw_q.get(timeout=seconds_to_next_save())
+        except queue.Empty:
+            ticks = ()
+        if ticks is None:       # shutdown sentinel from graceful_shutdown
+            return
+
+        try:
+            process_ticks(ticks)
+
+            # 💾 DB writes only inside market window
+            save_to_db_batch()
+        except Exception as e:
+            print("❌ Consumer error:", e)
 
 # ================= GRACEFUL SHUTDOWN =================
 def graceful_shutdown(reason):
     print(f"🛑 Shutdown initiated ({reason})")
 
     try:
+        if kws:
+            kws.close()
+    except:
+        pass
+
+    # stop the consumer, then process whatever it left in the queue
+    shutdown_event.set()
+    if consumer:
+        raw_q.put(None)
+        consumer.join()
+
+    try:
+        drain_queue()
         save_to_db_batch(force=True)
+        load_raw_log()
     except Exception as e:
         print("DB flush error:", e)
 
     try:
-        if kws:
-            kws.close()
-    except:
-        pass
+        create_indexes()
+        CONN.close()
+    except Exception as e:
+        print("DB close error:", e)
 
     print("✅ Final DB flushed, exiting")
-    shutdown_event.set()
     sys.exit(0)
 
 def signal_handler(signum, frame):
@@ -155,14 +366,7 @@ def setup_callbacks(ws):
         ws.set_mode(ws.MODE_FULL, TOKENS)
 
     def on_ticks(ws, ticks):
-        with lock:
-            for t in ticks:
-                token = t["instrument_token"]
-                store = tick_store[token]
-                store["ltp"] = t.get("last_price", 0.0)
-                store["volume"] = t.get("volume_traded", 0)
-                store["buy_qty"].append(t.get("total_buy_quantity", 0))
-                store["sell_qty"].append(t.get("total_sell_quantity", 0))
+        raw_q.put_nowait(ticks)
 
     def on_close(ws, code, reason):
         print("🔴 WebSocket closed:", reason)
@@ -185,6 +389,9 @@ if __name__ == "__main__":
     profile = kite.profile()
     print(f"👤 User: {profile.get('user_name')} | Type: {profile.get('user_type')}")
 
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+
     kws = KiteTicker(API_KEY, ACCESS_TOKEN)
     setup_callbacks(kws)
     kws.connect(threaded=True)
@@ -203,10 +410,10 @@ if __name__ == "__main__":
             if is_market_closed():
                 graceful_shutdown("market closed (15:30 IST)")
 
-            # 💾 DB writes only inside market window
-            save_to_db_batch()
-
-            time.sleep(1)
+            # nothing to do until one of the exits is due (signals still
+            # interrupt the sleep)
+            deadline = min(START_TIME + MAX_RUNTIME, MARKET_CLOSE_EPOCH)
+            time.sleep(max(0, deadline - time.time()))
 
     except Exception as e:
         print("❌ Fatal error:", e)
@@ -1,130 +1,684 @@
-import sqlite3
-from typing import List, Optional
-
-import pandas as pd
-
-
-def load_table_as_df(
-    db_file: str,
-    table_name: str,
-    columns: Optional[List[str]] = None) -> pd.DataFrame:
-    """
-    Load a table (or a subset of its columns) from an SQLite database into a pandas DataFrame.
-
-    Parameters
-    ----------
-    db_file : str
-        Path to the SQLite database file.  Example: "my_database.sqlite".
-    table_name : str
-        Name of the table you want to read.
-    columns : list[str] | None, optional
-        List of column names to fetch.  If ``None`` (the default) all columns are returned.
-
-    Returns
-    -------
-    pd.DataFrame
-        DataFrame containing the requested data.
-
-    Raises
-    ------
-    FileNotFoundError
-        If the database file does not exist.
-    sqlite3.Error
-        If a problem occurs while connecting to or querying the database.
-    ValueError
-        If the table name is empty or contains only whitespace.
-    """
-    if not table_name or table_name.strip() == "":
-        raise ValueError("table_name must be a non‑empty string")
-    # Build the SELECT clause
-    col_expr = "*" if columns is None else ", ".join([f'"{c}"' for c in columns])
-    sql = f'SELECT {col_expr} FROM "{table_name}"'
-    try:
-        conn = sqlite3.connect(db_file)
-        df = pd.read_sql_query(sql, conn)
-    finally:
-        # Ensure the connection is always closed
-        conn.close()
-    return df
-
-def get_all_table_names(db_file: str) -> List[str]:
-    """
-    Return a list of all table names in the given SQLite database.
-
-    Parameters
-    ----------
-    db_file : str
-        Path to the SQLite database file.
-
-    Returns
-    -------
-    List[str]
-        Names of every table defined in the database (excluding internal tables such as
-        sqlite_sequence).  The order is the same as returned by the query.
-
-    Raises
-    ------
-    FileNotFoundError
-        If the specified database file does not exist.
-    sqlite3.Error
-        If a problem occurs while connecting to or querying the database.
-    """
-    # SQLite keeps metadata in the table called "sqlite_master".
-    sql = (
-        "SELECT name FROM sqlite_master "
-        "WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
-    )
-
-    with sqlite3.connect(db_file) as conn:
-        cursor = conn.execute(sql)
-        tables = [row[0] for row in cursor.fetchall()]
-
-    return tables
-
-import sqlite3
-
-def fetch_table_value_as_int(
-    db_path: str,
-    table: str,
-    search_column: str,
-    result_column: str,
-    search_value
-) -> int | None:
-    """
-    Fetch a single integer value from SQLite DB.
-
-    Returns:
-        int value if found
-        None if not found or NULL
-    """
-
-    query = f"""
-        SELECT {result_column}
-        FROM {table}
-        WHERE {search_column} = ?
-        LIMIT 1
-    """
-
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (search_value,))
-            row = cursor.fetchone()
-
-            if row is None or row[0] is None:
-                return None
-
-            return int(row[0])
-
-    except sqlite3.Error as e:
-        print(f"SQLite error: {e}")
-        return None
-
-#tables = get_all_table_names("market_feed.db")
-
-#for table_name in enumerate(tables):
-#   print(f"{table_name}")
-
-
-#df_subset = load_table_as_df("market_feed.db", "main_table", ["symbol", "yfinance",])
-#print(df_subset.head(10))
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+try:  # optional: Arrow-backed columns and parquet sidecars for load_table_as_df
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:  # optional: columnar reads straight into Arrow, no per-row tuples
+    import adbc_driver_sqlite.dbapi as adbc_sqlite
+    from adbc_driver_manager import Error as AdbcError
+except ImportError:
+    adbc_sqlite = None
+
+# Idle connections per (path, read_only, immutable), reused across calls
+# instead of paying connect()/close() (and a cold page cache) every time.
+# Each queue is tagged with the (st_dev, st_ino) of the file its
+# connections were opened on.
+_POOL: Dict[Tuple[str, bool, bool], Tuple[Tuple[int, int], queue.SimpleQueue]] = {}
+_POOL_LOCK = threading.Lock()
+_POOL_MAX_IDLE = 2      # idle connections kept per key
+
+# Applied once, when a pooled connection is first opened.  The journal
+# settings need write access, so read-only connections skip them.
+_WRITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+)
+_PRAGMAS = (
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+_READ_ONLY_PRAGMAS = (
+    "PRAGMA query_only=true",
+)
+
+
+def _read_only_uri(db_file: str, immutable: bool = False) -> str:
+    uri = f"{Path(db_file).absolute().as_uri()}?mode=ro"
+    # immutable=1: no locking and no WAL/-shm handling at all; only valid
+    # while nothing writes the file.
+    return f"{uri}&immutable=1" if immutable else uri
+
+
+def _connect(db_file: str, read_only: bool = False, immutable: bool = False) -> sqlite3.Connection:
+    if read_only or immutable:
+        uri = _read_only_uri(db_file, immutable)
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+        pragmas = _PRAGMAS + _READ_ONLY_PRAGMAS
+    else:
+        conn = sqlite3.connect(db_file, check_same_thread=False, cached_statements=256)
+        pragmas = _WRITE_PRAGMAS + _PRAGMAS
+    for pragma in pragmas:
+        conn.execute(pragma)
+    return conn
+
+
+@contextmanager
+def pooled(
+    db_file: Union[str, sqlite3.Connection],
+    read_only: bool = False,
+    immutable: bool = False) -> Iterator[sqlite3.Connection]:
+    """
+    Borrow a long-lived connection to ``db_file`` from the module pool.
+
+    Parameters
+    ----------
+    db_file : str | sqlite3.Connection
+        Path to the SQLite database file, or an open connection, which is
+        yielded as-is and left entirely to the caller.
+    read_only : bool, optional
+        Borrow a ``mode=ro`` connection with ``query_only`` set instead of a
+        read-write one.  The two kinds are pooled separately.
+    immutable : bool, optional
+        Borrow a read-only connection opened with ``immutable=1``, which skips
+        file locking and WAL handling.  Only for files nothing is writing to;
+        changes still in a ``-wal`` file are not seen.
+
+    Yields
+    ------
+    sqlite3.Connection
+        A connection that is returned to the pool (not closed) on exit.
+        Any transaction left open by the caller is rolled back first.
+    """
+    idle, conn = _borrow(db_file, read_only, immutable)
+    try:
+        yield conn
+    finally:
+        _release(idle, conn)
+
+
+def _borrow(
+    db_file: Union[str, sqlite3.Connection],
+    read_only: bool,
+    immutable: bool = False) -> Tuple[Optional[queue.SimpleQueue], sqlite3.Connection]:
+    if isinstance(db_file, sqlite3.Connection):
+        return None, db_file
+    # One stat per call: a missing file raises FileNotFoundError (instead of
+    # connect() creating an empty database), and a replaced file retires the
+    # connections still open on the old one.
+    st = os.stat(db_file)
+    ident = (st.st_dev, st.st_ino)
+    key = (db_file, read_only or immutable, immutable)
+    entry = _POOL.get(key)
+    if entry is None or entry[0] != ident:
+        with _POOL_LOCK:
+            entry = _POOL.get(key)
+            if entry is None or entry[0] != ident:
+                if entry is not None:
+                    _drain(entry[1])
+                entry = _POOL[key] = (ident, queue.SimpleQueue())
+    idle = entry[1]
+    try:
+        return idle, idle.get_nowait()
+    except queue.Empty:
+        return idle, _connect(db_file, read_only, immutable)
+
+
+def _release(idle: Optional[queue.SimpleQueue], conn: sqlite3.Connection) -> None:
+    if idle is None:  # caller's own connection
+        return
+    if conn.in_transaction:
+        conn.rollback()
+    # Bursts (load_all_tables' workers) may open more; only a few stay open.
+    if idle.qsize() >= _POOL_MAX_IDLE:
+        conn.close()
+    else:
+        idle.put(conn)
+
+
+def _drain(idle: queue.SimpleQueue) -> None:
+    while True:
+        try:
+            idle.get_nowait().close()
+        except queue.Empty:
+            return
+
+
+@atexit.register
+def _close_pool() -> None:
+    # Connections still borrowed at exit are left to the interpreter.
+    with _POOL_LOCK:
+        for _, idle in _POOL.values():
+            _drain(idle)
+        _POOL.clear()
+
+
+# Rows pulled per fetchmany() call when materialising a result set.
+_FETCH_ROWS = 512
+
+
+def _arrow_column(values: list):
+    # Native-width Arrow array straight from the Python list; a column that
+    # mixes storage classes (SQLite allows it) stays a plain list.
+    try:
+        return pd.arrays.ArrowExtensionArray(pa.array(values))
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return values
+
+
+def _frame(names: List[str], data: List[list], dtype_backend: Optional[str] = None) -> pd.DataFrame:
+    if not data[0]:
+        return pd.DataFrame(columns=names)
+    if dtype_backend == "pyarrow":
+        data = [_arrow_column(col) for col in data]
+    # positional keys first, so duplicate column names survive
+    df = pd.DataFrame(dict(enumerate(data)))
+    df.columns = names
+    return df
+
+
+def _frame_from_cursor(cursor: sqlite3.Cursor, dtype_backend: Optional[str] = None) -> pd.DataFrame:
+    # Transpose each fetched batch straight into per-column lists, so the
+    # full result never exists as a list of row tuples, and let pandas pick
+    # each column's dtype from its list.
+    names = [d[0] for d in cursor.description]
+    data: List[list] = [[] for _ in names]
+    cursor.arraysize = _FETCH_ROWS
+    while True:
+        batch = cursor.fetchmany()
+        if not batch:
+            break
+        for col, values in zip(data, zip(*batch)):
+            col.extend(values)
+    return _frame(names, data, dtype_backend)
+
+
+def _load_via_adbc(db_file: str, sql: str, immutable: bool = False) -> pd.DataFrame:
+    # The driver hands back whole Arrow columns.  Columns that mix SQLite
+    # storage classes come back as strings here, unlike the sqlite3 path.
+    with adbc_sqlite.connect(_read_only_uri(db_file, immutable)) as conn, conn.cursor() as cursor:
+        cursor.execute(sql)
+        table = cursor.fetch_arrow_table()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _read_parquet(cache_path: str, dtype_backend: Optional[str] = None) -> pd.DataFrame:
+    table = pq.read_table(cache_path, memory_map=True)
+    if dtype_backend == "pyarrow":
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas()
+
+
+# (cache_path, stamp) pairs whose sidecar could not be written, so an
+# uncacheable table is not re-converted on every call.
+_UNCACHEABLE: set = set()
+
+
+def _write_parquet(df: pd.DataFrame, cache_path: str, stamp: float) -> None:
+    # Written beside the target and renamed into place, so a reader never
+    # sees half a file.  The mtime is pinned to the database's at read time:
+    # any later write to the database makes the sidecar stale.
+    tmp = f"{cache_path}.tmp"
+    try:
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp, compression="zstd")
+        os.utime(tmp, (stamp, stamp))
+        os.replace(tmp, cache_path)
+    except (pa.ArrowException, OSError) as e:
+        # e.g. a column mixing SQLite storage classes has no parquet type
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        _UNCACHEABLE.add((cache_path, stamp))
+        warnings.warn(f"Not caching {cache_path}: {e}", stacklevel=3)
+
+
+def _iter_frames(
+    idle: Optional[queue.SimpleQueue],
+    conn: sqlite3.Connection,
+    cursor: sqlite3.Cursor,
+    dtype_backend: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    # The query has already run (errors surface at call time); the borrowed
+    # connection goes back to the pool when the generator is exhausted or
+    # closed.  Only one chunk of rows is resident at a time.
+    try:
+        names = [d[0] for d in cursor.description]
+        batch = cursor.fetchmany()
+        if not batch:
+            yield pd.DataFrame(columns=names)
+            return
+        while batch:
+            yield _frame(names, [list(col) for col in zip(*batch)], dtype_backend)
+            batch = cursor.fetchmany()
+    finally:
+        cursor.close()
+        _release(idle, conn)
+
+
+def _quote(name: str) -> str:
+    # SQL identifier quoting: an embedded double quote is doubled.
+    return '"' + name.replace('"', '""') + '"'
+
+
+@lru_cache(maxsize=128)
+def _select_sql(table_name: str, columns: Optional[Tuple[str, ...]]) -> str:
+    # Build the SELECT clause
+    col_expr = "*" if columns is None else ", ".join([_quote(c) for c in columns])
+    return f"SELECT {col_expr} FROM {_quote(table_name)}"
+
+
+def load_table_as_df(
+    db_file: Union[str, sqlite3.Connection],
+    table_name: str,
+    columns: Optional[List[str]] = None,
+    chunksize: Optional[int] = None,
+    dtype_backend: Optional[str] = None,
+    cache: bool = False,
+    immutable: bool = False) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Load a table (or a subset of its columns) from an SQLite database into a pandas DataFrame.
+
+    Parameters
+    ----------
+    db_file : str | sqlite3.Connection
+        Path to the SQLite database file.  Example: "my_database.sqlite".
+        An open connection may be passed instead; it is used as-is and not closed.
+    table_name : str
+        Name of the table you want to read.
+    columns : list[str] | None, optional
+        List of column names to fetch.  If ``None`` (the default) all columns are returned.
+    chunksize : int | None, optional
+        If given, return an iterator of DataFrames of at most ``chunksize`` rows
+        instead of one DataFrame, so memory stays proportional to the chunk size.
+    dtype_backend : {"pyarrow"} | None, optional
+        ``"pyarrow"`` builds Arrow-backed columns of native width instead of
+        NumPy/object columns; it requires pyarrow.  If adbc_driver_sqlite is
+        installed too, the whole-table read goes through it instead of the
+        sqlite3 module.
+    cache : bool, optional
+        Keep a ``<db_file>.<table_name>.parquet`` sidecar of the whole table
+        (``.pyarrow.parquet`` for the Arrow backend) and read that
+        (memory-mapped) while it is at least as new as the database.  Only
+        used for whole-table, non-chunked reads from a path with pyarrow
+        installed.  Tables parquet cannot represent (a column mixing SQLite
+        storage classes) warn once and are read from SQLite as usual.
+    immutable : bool, optional
+        Open the file with ``immutable=1`` (no locking, no WAL handling).  Only
+        for snapshot files nothing is writing to; see :func:`pooled`.
+
+    Returns
+    -------
+    pd.DataFrame | Iterator[pd.DataFrame]
+        DataFrame containing the requested data, or an iterator of them when
+        ``chunksize`` is set.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the database file does not exist.
+    sqlite3.Error
+        If a problem occurs while connecting to or querying the database.
+    ImportError
+        If ``dtype_backend="pyarrow"`` is requested but pyarrow is not installed.
+    ValueError
+        If the table name is empty or contains only whitespace, ``chunksize``
+        is not positive, or ``dtype_backend`` is not supported.
+    """
+    if not (table_name and table_name.strip()):
+        raise ValueError("table_name must be a non‑empty string")
+    if chunksize is not None and chunksize <= 0:
+        raise ValueError("chunksize must be a positive integer")
+    if dtype_backend not in (None, "pyarrow"):
+        raise ValueError(f"dtype_backend must be None or 'pyarrow', not {dtype_backend!r}")
+    if dtype_backend == "pyarrow" and pa is None:
+        raise ImportError("dtype_backend='pyarrow' requires pyarrow")
+    sql = _select_sql(table_name, None if columns is None else tuple(columns))
+    if chunksize is not None:
+        idle, conn = _borrow(db_file, True, immutable)
+        try:
+            cursor = conn.execute(sql)
+        except BaseException:
+            _release(idle, conn)
+            raise
+        cursor.arraysize = chunksize
+        return _iter_frames(idle, conn, cursor, dtype_backend)
+    by_path = not isinstance(db_file, sqlite3.Connection)
+    if cache and by_path and columns is None and pa is not None:
+        # One sidecar per backend: each stores the frame exactly as that
+        # backend built it (ADBC, for one, reads mixed columns as strings).
+        suffix = ".pyarrow.parquet" if dtype_backend == "pyarrow" else ".parquet"
+        cache_path = f"{db_file}.{table_name}{suffix}"
+        stamp = _db_stamp(db_file)
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= stamp:
+            return _read_parquet(cache_path, dtype_backend)
+        df = load_table_as_df(db_file, table_name, dtype_backend=dtype_backend, immutable=immutable)
+        if (cache_path, stamp) not in _UNCACHEABLE:
+            _write_parquet(df, cache_path, stamp)
+        return df
+    if dtype_backend == "pyarrow" and by_path and adbc_sqlite is not None:
+        try:
+            return _load_via_adbc(db_file, sql, immutable)
+        except AdbcError:
+            pass  # let the sqlite3 path below raise (or succeed) as usual
+    with pooled(db_file, read_only=True, immutable=immutable) as conn:
+        df = _frame_from_cursor(conn.execute(sql), dtype_backend)
+    return df
+
+def get_all_table_names(db_file: Union[str, sqlite3.Connection]) -> List[str]:
+    """
+    Return a list of all table names in the given SQLite database.
+
+    Parameters
+    ----------
+    db_file : str | sqlite3.Connection
+        Path to the SQLite database file, or an open connection (used as-is,
+        not closed, and not cached since its file cannot be stat'ed).
+
+    Returns
+    -------
+    List[str]
+        Names of every table defined in the database (excluding internal tables such as
+        sqlite_sequence), including virtual tables and their shadow tables.  The order
+        is the same as returned by the query.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the specified database file does not exist.
+    sqlite3.Error
+        If a problem occurs while connecting to or querying the database.
+    """
+    if isinstance(db_file, sqlite3.Connection):
+        return list(_names_cached.__wrapped__(db_file, 0.0))
+    return list(_names_cached(db_file, _db_stamp(db_file)))
+
+
+def _db_stamp(db_file: str) -> float:
+    # A committed change may still sit in the -wal file, so take the newer
+    # of the two modification times.
+    stamp = os.path.getmtime(db_file)
+    wal = f"{db_file}-wal"
+    if os.path.exists(wal):
+        stamp = max(stamp, os.path.getmtime(wal))
+    return stamp
+
+
+if sqlite3.sqlite_version_info >= (3, 37, 0):
+    # Enumerates the schema directly, without scanning sqlite_master rows.
+    # sqlite_master records virtual tables and their shadow tables as type
+    # 'table' too, so all three kinds are kept for the same result on
+    # either branch.
+    _TABLE_NAMES_SQL = (
+        "SELECT name FROM pragma_table_list "
+        "WHERE schema='main' AND type IN ('table', 'virtual', 'shadow') "
+        "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )
+else:
+    # SQLite keeps metadata in the table called "sqlite_master".
+    _TABLE_NAMES_SQL = (
+        "SELECT name FROM sqlite_master "
+        "WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )
+
+
+@lru_cache(maxsize=32)
+def _names_cached(db_file: Union[str, sqlite3.Connection], stamp: float) -> Tuple[str, ...]:
+    sql = _TABLE_NAMES_SQL
+
+    with pooled(db_file, read_only=True) as conn:
+        cursor = conn.execute(sql)
+        tables = tuple(row[0] for row in cursor)
+
+    return tables
+
+def _cached(fn, db_path: Union[str, sqlite3.Connection], *args, **kwargs):
+    # A caller's connection is never used as a cache key: the caches would
+    # keep it alive after the caller closed it.
+    if isinstance(db_path, sqlite3.Connection):
+        return fn.__wrapped__(db_path, *args, **kwargs)
+    return fn(db_path, *args, **kwargs)
+
+
+_ROWID_ALIASES = ("rowid", "oid", "_rowid_")
+
+
+@lru_cache(maxsize=128)
+def _check_identifiers(
+    db_path: Union[str, sqlite3.Connection],
+    table: str,
+    *columns: str,
+    immutable: bool = False) -> None:
+    # Identifiers cannot be bound as parameters, so check them against the
+    # table's real columns before they are quoted into a statement.  SQLite
+    # matches names case-insensitively, and the rowid aliases resolve unless
+    # a real column shadows them.
+    with pooled(db_path, read_only=True, immutable=immutable) as conn:
+        known = {row[0].lower() for row in conn.execute(
+            "SELECT name FROM pragma_table_info(?)", (table,))}
+    if not known:
+        raise ValueError(f"Table '{table}' does not exist in {db_path}")
+    for column in columns:
+        if column.lower() not in known and column.lower() not in _ROWID_ALIASES:
+            raise ValueError(f"Column '{column}' does not exist in table '{table}'")
+
+
+def _lookup_text(table: str, search_column: str, result_column: str) -> str:
+    return (
+        f"SELECT {_quote(result_column)} FROM {_quote(table)} "
+        f"WHERE {_quote(search_column)} = ? LIMIT 1"
+    )
+
+
+@lru_cache(maxsize=128)
+def _lookup_sql(
+    db_path: str,
+    table: str,
+    search_column: str,
+    result_column: str,
+    immutable: bool = False) -> str:
+    # Stable SQL text per lookup keeps the per-connection statement cache hitting.
+    _check_identifiers(db_path, table, search_column, result_column, immutable=immutable)
+    return _lookup_text(table, search_column, result_column)
+
+
+# (db_path, table, search_column, auto_index) keys whose query plan has
+# already been inspected.  Paths only; see _cached.
+_PLAN_CHECKED: set = set()
+
+
+def _check_plan(
+    db_path: Union[str, sqlite3.Connection],
+    query: str,
+    table: str,
+    search_column: str,
+    auto_index: bool,
+    immutable: bool = False) -> None:
+    with pooled(db_path, read_only=True, immutable=immutable) as conn:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {query}", (None,)).fetchall()
+    if not any(row[-1].startswith("SCAN") for row in plan):
+        return
+    if auto_index:
+        ddl = (
+            f"CREATE INDEX IF NOT EXISTS {_quote(f'idx_{table}_{search_column}')} "
+            f"ON {_quote(table)} ({_quote(search_column)})"
+        )
+        if isinstance(db_path, sqlite3.Connection):
+            # The caller owns any open transaction; the index lands with it.
+            db_path.execute(ddl)
+        else:
+            # A one-off plain connection: the pooled read-write ones would
+            # switch the file to WAL as a side effect.
+            with closing(sqlite3.connect(db_path)) as conn, conn:
+                conn.execute(ddl)
+    else:
+        warnings.warn(
+            f"Lookups on {table}.{search_column} scan the whole table; "
+            f"index the column or pass auto_index=True",
+            stacklevel=3,
+        )
+
+
+def fetch_table_value_as_int(
+    db_path: Union[str, sqlite3.Connection],
+    table: str,
+    search_column: str,
+    result_column: str,
+    search_value,
+    auto_index: bool = False,
+    immutable: bool = False
+) -> int | None:
+    """
+    Fetch a single integer value from SQLite DB.
+
+    The first lookup per table/column checks the query plan and warns if
+    search_column is not indexed; with auto_index=True the index is created
+    instead.  immutable=True opens the file with immutable=1 (no locking, no
+    WAL handling) for snapshot databases nothing writes to.
+
+    db_path may also be an open sqlite3.Connection, which is used as-is:
+    never closed or committed.  Nothing can be memoised per connection
+    (sqlite3.Connection takes no weak references), so such a lookup skips
+    the checks and runs only the lookup statement: a bad table or column
+    raises sqlite3.OperationalError rather than ValueError, and the query
+    plan is inspected (on every call) only when auto_index=True.
+
+    Returns:
+        int value if found
+        None if not found or NULL
+
+    Raises:
+        FileNotFoundError if db_path does not exist
+        ValueError if table or either column does not exist, or if
+        auto_index and immutable are both set
+        sqlite3.Error if the lookup itself fails (e.g. database locked)
+    """
+
+    if auto_index and immutable:
+        raise ValueError("auto_index cannot write to a database opened with immutable=True")
+
+    if isinstance(db_path, sqlite3.Connection):
+        query = _lookup_text(table, search_column, result_column)
+        if auto_index:
+            _check_plan(db_path, query, table, search_column, auto_index, immutable)
+    else:
+        query = _lookup_sql(db_path, table, search_column, result_column, immutable)
+        plan_key = (db_path, table, search_column, auto_index)
+        if plan_key not in _PLAN_CHECKED:
+            _check_plan(db_path, query, table, search_column, auto_index, immutable)
+            _PLAN_CHECKED.add(plan_key)
+
+    # Hot path: borrow/release directly rather than through the pooled()
+    # context manager, so a lookup is one execute() and one fetchone().
+    idle, conn = _borrow(db_path, True, immutable)
+    try:
+        row = conn.execute(query, (search_value,)).fetchone()
+    finally:
+        _release(idle, conn)
+
+    if row is None or row[0] is None:
+        return None
+
+    return int(row[0])
+
+# Stay under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds).
+_IN_CHUNK = 900
+
+
+def fetch_values(
+    db_path: Union[str, sqlite3.Connection],
+    table: str,
+    search_column: str,
+    result_column: str,
+    values: Sequence
+) -> Dict[object, int]:
+    """
+    Fetch integer values for many search values with one query per 900 keys.
+    db_path may be a path or an open sqlite3.Connection.
+
+    Returns:
+        dict of search value -> int for every value found with a non-NULL
+        result; missing values are simply absent
+
+    Raises:
+        FileNotFoundError if db_path does not exist
+        ValueError if table or either column does not exist
+        sqlite3.Error if a query fails (e.g. database locked)
+    """
+
+    _cached(_check_identifiers, db_path, table, search_column, result_column)
+    keys = list(dict.fromkeys(values))
+    found: Dict[object, int] = {}
+
+    with pooled(db_path, read_only=True) as conn:
+        for start in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[start:start + _IN_CHUNK]
+            query = (
+                f"SELECT {_quote(search_column)}, {_quote(result_column)} FROM {_quote(table)} "
+                f"WHERE {_quote(search_column)} IN ({','.join('?' * len(chunk))})"
+            )
+            for key, value in conn.execute(query, chunk):
+                if value is not None:
+                    found.setdefault(key, int(value))
+
+    return found
+
+def load_all_tables(
+    db_file: Union[str, sqlite3.Connection],
+    table_names: Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
+    immutable: bool = False) -> Dict[str, pd.DataFrame]:
+    """
+    Load several tables at once, one pooled read-only connection per worker thread.
+
+    Parameters
+    ----------
+    db_file : str | sqlite3.Connection
+        Path to the SQLite database file.  An open connection is accepted too,
+        but a single connection cannot be shared across threads, so the tables
+        are then read one after another.
+    table_names : list[str] | None, optional
+        Tables to load.  If ``None`` (the default) every table from
+        :func:`get_all_table_names` is loaded.
+    max_workers : int | None, optional
+        Number of threads.  Defaults to the number of tables, capped at the
+        CPU count.
+    immutable : bool, optional
+        Passed through to :func:`load_table_as_df`.
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        DataFrame per table name, in the order of ``table_names``.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the database file does not exist.
+    sqlite3.Error
+        If a problem occurs while connecting to or querying the database.
+    """
+    names = get_all_table_names(db_file) if table_names is None else list(table_names)
+
+    def load(name: str) -> pd.DataFrame:
+        return load_table_as_df(db_file, name, immutable=immutable)
+
+    if isinstance(db_file, sqlite3.Connection) or len(names) < 2:
+        return {name: load(name) for name in names}
+
+    # sqlite3 releases the GIL while stepping a statement, so reads on
+    # separate connections overlap.
+    workers = max_workers or min(len(names), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return dict(zip(names, ex.map(load, names)))
+
+#tables = get_all_table_names("market_feed.db")
+
+#for table_name in enumerate(tables):
+#   print(f"{table_name}")
+
+
+#df_subset = load_table_as_df("market_feed.db", "main_table", ["symbol", "yfinance",])
+#print(df_subset.head(10))
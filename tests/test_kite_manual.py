@@ -0,0 +1,100 @@
+import importlib
+import os
+import shutil
+import signal
+import sqlite3
+import sys
+
+import pytest
+
+TIKERS_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tikers.db")
+
+
+@pytest.fixture
+def start_run(tmp_path, monkeypatch):
+    """Import kite_manual afresh in tmp_path, as a new collector run would."""
+    pytest.importorskip("kiteconnect")
+    pytest.importorskip("numba")
+    shutil.copy(TIKERS_DB, tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("KITE_API_KEY", "test")
+    monkeypatch.setenv("KITE_ACCESS_TOKEN", "test")
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+    runs = []
+
+    def start():
+        sys.modules.pop("kite_manual", None)
+        run = importlib.import_module("kite_manual")
+        runs.append(run)
+        return run
+
+    yield start
+
+    for run in runs:
+        run.raw_log.close()
+        run.CONN.close()
+    sys.modules.pop("kite_manual", None)
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+
+
+def spool(run, slot, ltp, volume):
+    run.tick_ltp[:] = float("nan")
+    run.tick_ltp[slot] = ltp
+    run.tick_volume[slot] = volume
+    run.save_to_db_batch(force=True)
+
+
+def ticks(run):
+    conn = sqlite3.connect(run.DB_FILE)
+    try:
+        return conn.execute(
+            "SELECT symbol, ltp, volume, avg_buy_qty, avg_sell_qty FROM ticks ORDER BY ltp"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def test_raw_log_round_trip(start_run):
+    run = start_run()
+    spool(run, 0, 101.5, 10)
+    spool(run, 3, 202.25, 20)
+
+    run.load_raw_log()
+
+    assert ticks(run) == [
+        (run.token_to_symbol[run.TOKENS[0]], 101.5, 10, 0.0, 0.0),
+        (run.token_to_symbol[run.TOKENS[3]], 202.25, 20, 0.0, 0.0),
+    ]
+    assert not os.path.exists(run.LOG_FILE)
+    assert run.CONN.execute("PRAGMA synchronous").fetchone()[0] == 1   # NORMAL again
+
+
+def test_torn_tail_then_append(start_run):
+    crashed = start_run()
+    spool(crashed, 0, 101.5, 10)
+    crashed.raw_log.write(b"\xff" * (crashed.RECORD.itemsize // 2))   # died mid-write
+    crashed.raw_log.close()
+    crashed.CONN.close()
+
+    restarted = start_run()
+    assert os.path.getsize(restarted.LOG_FILE) == restarted.RECORD.itemsize
+    spool(restarted, 3, 202.25, 20)
+
+    restarted.load_raw_log()
+
+    assert ticks(restarted) == [
+        (restarted.token_to_symbol[restarted.TOKENS[0]], 101.5, 10, 0.0, 0.0),
+        (restarted.token_to_symbol[restarted.TOKENS[3]], 202.25, 20, 0.0, 0.0),
+    ]
+
+
+def test_load_raw_log_in_slices(start_run, monkeypatch):
+    run = start_run()
+    monkeypatch.setattr(run, "LOAD_SLICE", 2)
+    for i in range(5):
+        spool(run, i, 100.0 + i, i)
+
+    run.load_raw_log()
+
+    assert [row[1] for row in ticks(run)] == [100.0, 101.0, 102.0, 103.0, 104.0]
@@ -0,0 +1,139 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import my_helpers as my
+
+TIKERS_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tikers.db")
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "tikers.db")
+    shutil.copy(TIKERS_DB, path)
+    return path
+
+
+def test_missing_file_raises(tmp_path):
+    path = str(tmp_path / "nope.db")
+    with pytest.raises(FileNotFoundError):
+        my.load_table_as_df(path, "main_table")
+    with pytest.raises(FileNotFoundError):
+        my.get_all_table_names(path)
+    assert not os.path.exists(path)
+
+
+def test_deleted_file_raises_despite_pooled_connection(db):
+    assert len(my.load_table_as_df(db, "main_table")) == 500
+    assert my.get_all_table_names(db) == ["main_table"]
+    assert my.fetch_table_value_as_int(db, "main_table", "symbol", "nse_instrument_token", "TCS")
+
+    os.remove(db)
+
+    with pytest.raises(FileNotFoundError):
+        my.load_table_as_df(db, "main_table")
+    with pytest.raises(FileNotFoundError):
+        my.load_table_as_df(db, "main_table", chunksize=100)
+    with pytest.raises(FileNotFoundError):
+        my.get_all_table_names(db)
+    with pytest.raises(FileNotFoundError):
+        my.fetch_table_value_as_int(db, "main_table", "symbol", "nse_instrument_token", "TCS")
+    with pytest.raises(FileNotFoundError):
+        my.fetch_values(db, "main_table", "symbol", "nse_instrument_token", ["TCS"])
+
+
+def test_replaced_file_is_reopened(db, tmp_path):
+    assert len(my.load_table_as_df(db, "main_table")) == 500
+
+    other = str(tmp_path / "other.db")
+    with sqlite3.connect(other) as conn:
+        conn.execute("CREATE TABLE main_table (symbol TEXT, nse_instrument_token INTEGER)")
+        conn.execute("INSERT INTO main_table VALUES ('ONLY', 1)")
+    conn.close()
+    os.replace(other, db)
+
+    df = my.load_table_as_df(db, "main_table")
+    assert df["symbol"].tolist() == ["ONLY"]
+
+
+def test_identifiers_match_case_insensitively(db):
+    expected = my.fetch_table_value_as_int(db, "main_table", "symbol", "nse_instrument_token", "TCS")
+    assert expected is not None
+    assert my.fetch_table_value_as_int(db, "MAIN_TABLE", "SYMBOL", "NSE_Instrument_Token", "TCS") == expected
+    assert my.fetch_values(db, "main_table", "Symbol", "nse_instrument_token", ["TCS"]) == {"TCS": expected}
+
+
+def test_rowid_aliases_are_accepted(db):
+    token = my.fetch_table_value_as_int(db, "main_table", "rowid", "nse_instrument_token", 1)
+    assert token is not None
+    for alias in ("oid", "_rowid_", "ROWID"):
+        assert my.fetch_table_value_as_int(db, "main_table", alias, "nse_instrument_token", 1) == token
+
+
+def test_unknown_identifiers_raise(db):
+    with pytest.raises(ValueError, match="Column"):
+        my.fetch_table_value_as_int(db, "main_table", 'symbol" OR 1=1 --', "nse_instrument_token", "x")
+    with pytest.raises(ValueError, match="Table"):
+        my.fetch_table_value_as_int(db, "no_such_table", "symbol", "nse_instrument_token", "x")
+
+
+def test_identifiers_with_quotes_are_escaped(tmp_path):
+    path = str(tmp_path / "quotes.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE "odd ""t""" ("k""ey" TEXT, "va""l" INTEGER)')
+        conn.execute('INSERT INTO "odd ""t""" VALUES (?, ?)', ("a", 7))
+    conn.close()
+
+    assert my.fetch_table_value_as_int(path, 'odd "t"', 'k"ey', 'va"l', "a") == 7
+    assert my.fetch_values(path, 'odd "t"', 'k"ey', 'va"l', ["a", "b"]) == {"a": 7}
+    df = my.load_table_as_df(path, 'odd "t"', ['k"ey', 'va"l'])
+    assert df.columns.tolist() == ['k"ey', 'va"l']
+    assert df.values.tolist() == [["a", 7]]
+
+
+def test_caller_connection_lookup_runs_one_statement(db):
+    conn = sqlite3.connect(db)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        token = my.fetch_table_value_as_int(conn, "main_table", "yfinance", "nse_instrument_token", "TCS.NS")
+        assert token is not None
+        assert len(statements) == 1
+    finally:
+        conn.close()
+
+
+def test_lookup_errors_propagate(db):
+    conn = sqlite3.connect(db)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            my.fetch_table_value_as_int(conn, "no_such_table", "symbol", "nse_instrument_token", "TCS")
+    finally:
+        conn.close()
+    assert my.fetch_table_value_as_int(db, "main_table", "symbol", "nse_instrument_token", "NOPE") is None
+
+
+def test_dtype_backend_is_validated(db, monkeypatch):
+    with pytest.raises(ValueError, match="dtype_backend"):
+        my.load_table_as_df(db, "main_table", dtype_backend="numpy_nullable")
+    monkeypatch.setattr(my, "pa", None)
+    with pytest.raises(ImportError):
+        my.load_table_as_df(db, "main_table", dtype_backend="pyarrow")
+
+
+def test_load_all_tables_keeps_few_idle_connections(tmp_path):
+    path = str(tmp_path / "many.db")
+    with sqlite3.connect(path) as conn:
+        for i in range(8):
+            conn.execute(f"CREATE TABLE t{i} (a INTEGER)")
+            conn.executemany(f"INSERT INTO t{i} VALUES (?)", [(j,) for j in range(1000)])
+    conn.close()
+
+    frames = my.load_all_tables(path, max_workers=8)
+
+    assert list(frames) == [f"t{i}" for i in range(8)]
+    assert all(len(df) == 1000 for df in frames.values())
+    _, idle = my._POOL[(path, True, False)]
+    assert idle.qsize() <= my._POOL_MAX_IDLE